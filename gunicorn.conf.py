@@ -0,0 +1,7 @@
+from settings import Settings
+from v1.routines.inference_pool import get_inference_pool
+
+
+def post_worker_init(worker):
+    # Start the inference pool when the worker boots instead of on its first request.
+    get_inference_pool(Settings())
@@ -23,6 +23,10 @@ class Settings(metaclass=Singleton):
         self.__dict__ = config[env]
         self.env = env
         self.version = os.environ.get("TAG", "0.0.0")
+        self.inference_workers = int(os.environ.get("INFERENCE_WORKERS", self.inference_workers))
+        self.inference_queue_depth = int(os.environ.get("INFERENCE_QUEUE_DEPTH", self.inference_queue_depth))
+        self.opencv_threads = int(os.environ.get("OPENCV_THREADS", self.opencv_threads))
+        self.inference_timeout = float(os.environ.get("INFERENCE_TIMEOUT", self.inference_timeout))
         os.environ["app_name"] = self.app_name
         self.set_logger()
 
@@ -0,0 +1,140 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from v1.routines.inference_pool import (
+    InferencePool,
+    InferenceQueueFull,
+    InferenceTimeout,
+    InferenceWorkerError,
+)
+
+
+class FakeClassifier:
+    """Picklable stand-in for the trained classifier, always predicting label "1"."""
+
+    def __init__(self, delay=0, crash=False):
+        self.delay = delay
+        self.crash = crash
+
+    def predict(self, features):
+        if self.crash:
+            os._exit(1)
+        time.sleep(self.delay)
+        return ["1"]
+
+
+def shm_segments():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+def make_image():
+    return np.full((200, 200, 3), 128, np.uint8)
+
+
+@pytest.fixture
+def make_pool():
+    pools = []
+
+    def _make_pool(size=1, queue_depth=4, timeout=30, **kwargs):
+        pool = InferencePool({"clf": FakeClassifier(**kwargs)}, size, queue_depth, 1, timeout, monitor_interval=0.1)
+        pools.append(pool)
+        return pool
+
+    yield _make_pool
+    for pool in pools:
+        pool.close(timeout=1)
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_submit_round_trip(make_pool):
+    pool = make_pool()
+    before = shm_segments()
+
+    pred_label, output, stats = pool.submit(make_image(), roi=True).result(timeout=30)
+    assert pred_label == "1"
+    assert isinstance(output, list)
+    assert stats["roi"] == [0, 0, 200, 200]
+    assert shm_segments() == before
+
+
+def test_submit_raises_when_queue_is_full(make_pool):
+    pool = make_pool(queue_depth=1, delay=1)
+    before = shm_segments()
+
+    futures = []
+    with pytest.raises(InferenceQueueFull):
+        for _ in range(4):
+            futures.append(pool.submit(make_image()))
+
+    for future in futures:
+        assert future.result(timeout=30)[0] == "1"
+    assert shm_segments() == before
+
+
+def test_worker_exception_reaches_future(make_pool):
+    pool = make_pool()
+    before = shm_segments()
+
+    future = pool.submit(np.zeros((10, 10), np.uint8))
+    with pytest.raises(Exception) as excinfo:
+        future.result(timeout=30)
+    assert not isinstance(excinfo.value, (InferenceTimeout, InferenceWorkerError))
+    assert shm_segments() == before
+
+
+def test_worker_death_fails_future_and_respawns(make_pool):
+    pool = make_pool(timeout=20, crash=True)
+    before = shm_segments()
+    dead_pid = pool._processes[0].pid
+
+    future = pool.submit(make_image())
+    with pytest.raises(InferenceWorkerError):
+        future.result(timeout=10)
+    assert shm_segments() == before
+    assert wait_for(lambda: pool._processes[0].pid != dead_pid and pool._processes[0].is_alive())
+
+
+def test_process_times_out(make_pool):
+    pool = make_pool(timeout=0.5, delay=3)
+    before = shm_segments()
+
+    with pytest.raises(InferenceTimeout):
+        pool.process(make_image())
+    assert shm_segments() == before
+
+
+def test_expired_tasks_do_not_kill_the_worker(make_pool):
+    pool = make_pool(timeout=0.5, delay=2)
+    pid = pool._processes[0].pid
+    before = shm_segments()
+
+    futures = [pool.submit(make_image()) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(InferenceTimeout):
+            future.result(timeout=10)
+
+    # the worker dequeues the expired tasks once the running one finishes
+    assert wait_for(lambda: pool._task_queue.empty(), timeout=10)
+    time.sleep(2.5)
+    assert pool._processes[0].pid == pid
+    assert pool._processes[0].is_alive()
+    assert shm_segments() == before
+
+
+def test_dispatcher_survives_bad_message(make_pool):
+    pool = make_pool()
+    pool._result_queue.put(("done", -1))
+
+    assert pool.submit(make_image()).result(timeout=30)[0] == "1"
+    assert pool._dispatcher.is_alive()
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from v1.modules.segmentation import Segmentation
+from v1.modules.utils import find_vegetation_roi, rotate_img_without_crop
+
+
+def make_frame(height=400, width=400, band=None, spacing=20):
+    """Grey frame with optional green plant rows between the rows band[0] and band[1]."""
+    img = np.full((height, width, 3), 128, np.uint8)
+    if band is not None:
+        for x in range(10, width - 10, spacing):
+            img[band[0]:band[1], x:x + 6] = (40, 160, 40)
+    return img
+
+
+@pytest.fixture
+def segmentation():
+    return Segmentation()
+
+
+def test_rotate_img_without_crop_non_square():
+    img = np.zeros((100, 300), np.uint8)
+    img[40:60, 10:290] = 255
+
+    assert np.array_equal(rotate_img_without_crop(img, 0), img)
+    assert rotate_img_without_crop(img, 90).shape == (300, 100)
+
+
+def test_post_processing_offset(segmentation):
+    full_mask = np.zeros((300, 400), np.uint8)
+    full_mask[100:250, 200:230] = 255
+    full_mask[120:260, 300:310] = 255
+    x, y = 150, 60
+    crop_mask = full_mask[y:, x:]
+
+    for bbox in (True, False):
+        full = segmentation._post_processing(full_mask, bbox=bbox)
+        crop = segmentation._post_processing(crop_mask, bbox=bbox, offset=(x, y), img_width=400)
+        assert len(full) == 2
+        assert sorted(crop) == sorted(full)
+
+
+def test_find_vegetation_roi_excludes_empty_band():
+    img = make_frame(band=(200, 400))
+    x, y, w, h = find_vegetation_roi(img)
+    assert 100 <= y < 200
+    assert y + h == 400
+    assert x == 0 and w == 400
+
+
+def test_find_vegetation_roi_without_vegetation():
+    assert find_vegetation_roi(make_frame()) is None
+
+
+def test_apply_segment_roi_stats(segmentation):
+    img = make_frame(band=(200, 400))
+    x, y, w, h = segmentation._find_roi(img)
+
+    output, stats = segmentation.apply_segment(img, "1", bbox=True, roi=True)
+    assert stats["roi"] == [x, y, w, h]
+    assert stats["skipped_pixels"] == 400 * 400 - w * h
+    assert stats["skipped_ratio"] == round(stats["skipped_pixels"] / (400 * 400), 4)
+    for box in output:
+        for px, py in box:
+            assert py >= y - 1
+
+
+def test_apply_segment_falls_back_to_full_frame(segmentation):
+    img = make_frame()
+    assert segmentation._find_roi(img) is None
+
+    output, stats = segmentation.apply_segment(img, "1", roi=True)
+    assert stats["roi"] == [0, 0, 400, 400]
+    assert stats["skipped_pixels"] == 0
+    assert stats["skipped_ratio"] == 0.0
+
+
+@pytest.mark.parametrize("band", [(300, 600), (0, 300), (200, 450)])
+def test_apply_segment_roi_matches_full_frame(segmentation, band):
+    img = make_frame(600, 600, band=band, spacing=60)
+
+    full, _ = segmentation.apply_segment(img, "0", bbox=True)
+    crop, stats = segmentation.apply_segment(img, "0", bbox=True, roi=True)
+    assert stats["skipped_pixels"] > 0
+    assert len(full) == 10
+    assert sorted(crop) == sorted(full)
+
+
+def test_apply_segment_roi_keeps_regions_away_from_the_crop_border(segmentation):
+    img = make_frame(800, 600, band=(250, 550), spacing=60)
+
+    full, _ = segmentation.apply_segment(img, "2", bbox=True)
+    crop, stats = segmentation.apply_segment(img, "2", bbox=True, roi=True)
+    x, y, w, h = stats["roi"]
+
+    def inside(box):
+        return all(y < py < y + h - 1 for _, py in box)
+
+    assert len(crop) == len(full)
+    assert sorted(filter(inside, crop)) == sorted(filter(inside, full))
@@ -5,7 +5,7 @@ from v1.modules.preprocessing import automatic_bright_contrast
 from v1.modules.utils import (
     get_most_freq_angle,
     rotate_img_without_crop, calc_angle_rotation_vertical,
-    rotate_img_crop
+    rotate_img_crop, find_vegetation_roi
 )
 
 
@@ -141,50 +141,102 @@ class Segmentation:
         h_blur = cv2.GaussianBlur(h, (5, 5), 0)
         return self._segment(h_blur, 500)
 
-    def _post_processing(self, binary_img, bbox=False):
+    def _post_processing(self, binary_img, bbox=False, offset=(0, 0), img_width=None):
         """
         The _post_processing function takes in a binary image and returns a list of bounding boxes or lines.
+        When the binary image is a crop, the contours are shifted by its offset before fitting, so the
+        bounding boxes and lines come out in full-frame coordinates.
 
         Args:
             binary_img (np.array): Find the contours of the image
             bbox (bool): Determine whether the function should return bounding boxes or lines
+            offset (tuple): Position (x, y) of the binary image in the full frame
+            img_width (int): Width of the full frame, defaults to the width of the binary image
 
         Returns:
             A list of bounding boxes if the bbox parameter is true
         """
-        contours, hierarchy = cv2.findContours(binary_img, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        contours, hierarchy = cv2.findContours(binary_img, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE, offset=offset)
         if bbox:
             bbox_list = self._bbox_detection(contours, 500)
             return bbox_list
-        lines_list = self._line_detection(contours, 500, binary_img.shape[1])
+        if img_width is None:
+            img_width = binary_img.shape[1]
+        lines_list = self._line_detection(contours, 500, img_width)
         return lines_list
 
-    def apply_segment(self, img, label, bbox=False):
+    def _find_roi(self, img, min_size=64, context=80):
+        """
+        Runs the coarse vegetation pass and decides whether the expensive pipeline can be restricted
+        to a crop. The region is expanded by a context border that covers the reach of the segmentation
+        (up to 60 morphology iterations of a 3px kernel plus half of the 31px threshold block), so the
+        crop border does not change the masks of the rows inside it. Regions that are too small to
+        segment, or that cover the whole frame, are discarded.
+
+        Args:
+            img (np.array): Pass the BGR image to be analysed
+            min_size (int): Minimum width and height of a usable region
+            context (int): Pixels added around the region before cropping
+
+        Returns:
+            A tuple (x, y, w, h) with the region to segment, or None to use the full frame
+        """
+        roi = find_vegetation_roi(img)
+        if roi is None:
+            return None
+        x, y, w, h = roi
+        if w < min_size or h < min_size:
+            return None
+
+        img_height, img_width = img.shape[0], img.shape[1]
+        x0, y0 = max(x - context, 0), max(y - context, 0)
+        x1, y1 = min(x + w + context, img_width), min(y + h + context, img_height)
+        if x1 - x0 == img_width and y1 - y0 == img_height:
+            return None
+        return x0, y0, x1 - x0, y1 - y0
+
+    def apply_segment(self, img, label, bbox=False, roi=False):
         """
         The apply_segment function takes in an image and a label, and returns the segmented image.
+        When roi is set, a coarse pass first locates the region containing vegetation and the
+        segmentation runs only on that crop.
 
         Args:
             img (np.array): Pass the image to be segmented into the function
             label (str): Determine which model to use for segmentation
             bbox (bool): Determine if the bounding box should be returned or not
+            roi (bool): Restrict the segmentation to the region containing vegetation
 
         Returns:
-            A tuple of the segmented image and the bounding box or lines
+            A tuple of the bounding boxes or lines and a dict with the region stats
         """
+        img_height, img_width = img.shape[0], img.shape[1]
+        x, y, w, h = 0, 0, img_width, img_height
+        if roi:
+            region = self._find_roi(img)
+            if region is not None:
+                x, y, w, h = region
+
+        input_img = self._pre_processing(img, 1)
+        input_img = input_img[y:y + h, x:x + w]
         if label in ["0"]:
-            input_img = self._pre_processing(img, 1)
             output_mask = self._segment_label_a(input_img)
-            output = self._post_processing(output_mask, bbox=bbox)
         if label in ["1"]:
-            input_img = self._pre_processing(img, 1)
             output_mask = self._segment_label_b(input_img)
-            output = self._post_processing(output_mask, bbox=bbox)
         if label in ["2", "4"]:
-            input_img = self._pre_processing(img, 1)
             output_mask = self._segment_label_c(input_img)
-            output = self._post_processing(output_mask, bbox=bbox)
         if label in ["3"]:
-            input_img = self._pre_processing(img, 1)
             output_mask = self._segment_label_d(input_img)
+        if (w, h) != (img_width, img_height):
+            output = self._post_processing(output_mask, bbox=bbox, offset=(x, y), img_width=img_width)
+        else:
             output = self._post_processing(output_mask, bbox=bbox)
-        return output
+
+        total_area = img_width * img_height
+        skipped_area = total_area - w * h
+        stats = {
+            "roi": [x, y, w, h],
+            "skipped_pixels": skipped_area,
+            "skipped_ratio": round(skipped_area / total_area, 4),
+        }
+        return output, stats
@@ -46,12 +46,12 @@ def rotate_img_without_crop(img, angle):
     img_height, img_width = img.shape[0], img.shape[1]
     center_y, center_x = img_height//2, img_width//2
 
-    rotation_matrix = cv2.getRotationMatrix2D((center_y, center_x), angle, 1.0)
+    rotation_matrix = cv2.getRotationMatrix2D((center_x, center_y), angle, 1.0)
     cos_rotation = np.abs(rotation_matrix[0][0])
     sin_rotation = np.abs(rotation_matrix[0][1])
 
-    new_img_height = int((img_height * sin_rotation) + (img_width * cos_rotation))
-    new_img_width = int((img_height * cos_rotation) + (img_width * sin_rotation))
+    new_img_height = int((img_height * cos_rotation) + (img_width * sin_rotation))
+    new_img_width = int((img_height * sin_rotation) + (img_width * cos_rotation))
 
     rotation_matrix[0][2] += (new_img_width/2) - center_x
     rotation_matrix[1][2] += (new_img_height/2) - center_y
@@ -105,3 +105,45 @@ def calc_angle_rotation_vertical(angle):
     elif angle in [90, -90, 180, -180]:
         angle = 0
     return angle
+
+
+def find_vegetation_roi(img, scale=0.125, margin=0.05, min_area_ratio=0.001):
+    """
+    The find_vegetation_roi function runs a coarse pass over a heavily downscaled copy of the image to find
+    the region that actually contains vegetation. It binarizes the excess green index (2G - R - B) with Otsu,
+    dilates the mask so plants in the same rows merge, drops small blobs and returns the bounding rectangle of
+    what is left, expanded by a margin and mapped back to full-frame coordinates.
+
+    Args:
+        img (np.array): Pass the BGR image to be analysed
+        scale (float): Downscale factor used for the coarse pass
+        margin (float): Fraction of the image size added around the detected region
+        min_area_ratio (float): Ignore blobs smaller than this fraction of the downscaled image
+
+    Returns:
+        A tuple (x, y, w, h) with the region in full-frame coordinates, or None if nothing was found
+    """
+
+    img_height, img_width = img.shape[0], img.shape[1]
+    small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if small.shape[0] == 0 or small.shape[1] == 0:
+        return None
+
+    b, g, r = cv2.split(small.astype(np.int16))
+    exg = np.clip(2 * g - r - b, 0, 255).astype(np.uint8)
+    _, mask = cv2.threshold(exg, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    mask = cv2.dilate(mask, np.ones((5, 5), np.uint8), iterations=2)
+
+    min_area = min_area_ratio * small.shape[0] * small.shape[1]
+    contours, hierarchy = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contours = [cnt for cnt in contours if cv2.contourArea(cnt) >= min_area]
+    if not contours:
+        return None
+
+    x, y, w, h = cv2.boundingRect(np.concatenate(contours))
+    margin_x, margin_y = int(margin * img_width), int(margin * img_height)
+    x0 = max(int(x / scale) - margin_x, 0)
+    y0 = max(int(y / scale) - margin_y, 0)
+    x1 = min(int((x + w) / scale) + margin_x, img_width)
+    y1 = min(int((y + h) / scale) + margin_y, img_height)
+    return x0, y0, x1 - x0, y1 - y0
@@ -0,0 +1,333 @@
+import atexit
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+from v1.routines.plant_segmentation import PlantSegmentation
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference queue has no room for a new image."""
+
+
+class InferenceTimeout(Exception):
+    """Raised when an image is not processed within the pool timeout."""
+
+
+class InferenceWorkerError(Exception):
+    """Raised when the inference process handling an image dies."""
+
+
+def _inference_worker(model, opencv_threads, task_queue, result_queue):
+    """
+    Loop run by each inference process. It keeps a loaded PlantSegmentation routine, reads images from
+    the shared memory buffers announced on the task queue and sends the results back on the result queue.
+    Before processing an image it reports its pid, so the pool knows which tasks are lost if it dies.
+    Tasks whose deadline has passed are dropped without touching their buffer, since the pool already
+    failed them and unlinked it.
+
+    Args:
+        model (dict): Image type classifier model
+        opencv_threads (int): Number of threads used by OpenCV in this process
+        task_queue (multiprocessing.Queue): Queue with the tasks to be processed
+        result_queue (multiprocessing.Queue): Queue where the results are sent
+    """
+    cv2.setNumThreads(opencv_threads)
+    plant_segmentation = PlantSegmentation(None, model)
+    pid = os.getpid()
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, shm_name, shape, dtype, bbox, roi, deadline = task
+        if time.monotonic() > deadline:
+            result_queue.put(("done", task_id, None, InferenceTimeout("Image expired before it was processed")))
+            continue
+        result_queue.put(("started", task_id, pid))
+
+        shm = None
+        img_bgr = None
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            img_bgr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            result = plant_segmentation.process_image(img_bgr, bbox, roi)
+            error = None
+        except Exception as e:
+            result = None
+            # Drop the traceback so no frame keeps a view on the shared buffer.
+            error = e.with_traceback(None)
+        img_bgr = None
+        if shm is not None:
+            shm.close()
+
+        if error is not None:
+            try:
+                pickle.dumps(error)
+            except Exception:
+                error = RuntimeError(f"{type(error).__name__}: {error}")
+        result_queue.put(("done", task_id, result, error))
+
+
+class InferencePool:
+    """This class implements a pool of long-lived inference processes.
+
+    Images are handed to the processes through shared memory buffers, and only the buffer
+    name and the results travel through the queues. A monitor thread respawns dead processes
+    and fails the tasks they held or that exceeded the timeout.
+
+    Attributes:
+        logger (logging.Logger): Logger object.
+        size (int): Number of inference processes.
+        queue_depth (int): Maximum number of images waiting to be processed.
+        opencv_threads (int): Number of threads used by OpenCV in each process.
+        timeout (float): Maximum number of seconds an image can wait for its result.
+    """
+
+    def __init__(self, model, size, queue_depth, opencv_threads, timeout, monitor_interval=0.5):
+        """
+        Args:
+            model (dict): Image type classifier model.
+            size (int): Number of inference processes.
+            queue_depth (int): Maximum number of images waiting to be processed.
+            opencv_threads (int): Number of threads used by OpenCV in each process.
+            timeout (float): Maximum number of seconds an image can wait for its result.
+            monitor_interval (float): Seconds between two checks of the inference processes.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.size = size
+        self.queue_depth = queue_depth
+        self.opencv_threads = opencv_threads
+        self.timeout = timeout
+        self.monitor_interval = monitor_interval
+
+        self._model = model
+        self._context = multiprocessing.get_context("spawn")
+        self._task_queue = self._context.Queue(maxsize=queue_depth)
+        self._result_queue = self._context.Queue()
+        self._tasks = {}
+        self._tasks_lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._closing = threading.Event()
+
+        self._processes = [self._start_process() for _ in range(size)]
+
+        self._dispatcher = threading.Thread(target=self._dispatch_results, daemon=True)
+        self._dispatcher.start()
+        self._monitor = threading.Thread(target=self._monitor_processes, daemon=True)
+        self._monitor.start()
+        self.logger.info(
+            f"Inference pool started with {size} processes, queue depth {queue_depth} "
+            f"and {opencv_threads} OpenCV threads per process"
+        )
+
+    def _start_process(self):
+        """Start a new inference process."""
+        process = self._context.Process(
+            target=_inference_worker,
+            args=(self._model, self.opencv_threads, self._task_queue, self._result_queue),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _release(self, task_id):
+        """
+        Remove a task from the pending tasks and unlink its shared memory buffer.
+
+        Args:
+            task_id (int): Task identifier
+
+        Returns:
+            The future of the task, or None if the task was already released
+        """
+        with self._tasks_lock:
+            task = self._tasks.pop(task_id, None)
+        if task is None:
+            return None
+        try:
+            task["shm"].close()
+            task["shm"].unlink()
+        except FileNotFoundError:
+            pass
+        return task["future"]
+
+    def _dispatch_results(self):
+        """Resolve the pending futures with the results sent by the inference processes."""
+        while True:
+            try:
+                message = self._result_queue.get()
+                if message is None:
+                    break
+                if message[0] == "started":
+                    _, task_id, pid = message
+                    with self._tasks_lock:
+                        if task_id in self._tasks:
+                            self._tasks[task_id]["pid"] = pid
+                    continue
+
+                _, task_id, result, error = message
+                future = self._release(task_id)
+                if future is None:
+                    self.logger.debug(f"Discarding result of task {task_id}, it was already released")
+                elif error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            except Exception:
+                self.logger.exception("Failed to dispatch an inference result")
+
+    def _fail(self, task_id, error):
+        """Release a task and fail its future with the given error."""
+        future = self._release(task_id)
+        if future is not None:
+            future.set_exception(error)
+
+    def _monitor_processes(self):
+        """Respawn dead inference processes and fail the tasks that were lost or timed out."""
+        while not self._closing.wait(self.monitor_interval):
+            try:
+                for index, process in enumerate(self._processes):
+                    if process.is_alive() or self._closing.is_set():
+                        continue
+                    self.logger.error(
+                        f"Inference process {process.pid} died with exit code {process.exitcode}, respawning"
+                    )
+                    with self._tasks_lock:
+                        lost = [task_id for task_id, task in self._tasks.items() if task["pid"] == process.pid]
+                    for task_id in lost:
+                        self._fail(task_id, InferenceWorkerError(f"Inference process {process.pid} died"))
+                    self._processes[index] = self._start_process()
+
+                now = time.monotonic()
+                with self._tasks_lock:
+                    expired = [task_id for task_id, task in self._tasks.items() if task["deadline"] < now]
+                for task_id in expired:
+                    self._fail(task_id, InferenceTimeout(f"Image was not processed within {self.timeout}s"))
+            except Exception:
+                self.logger.exception("Failed to monitor the inference processes")
+
+    def submit(self, img_bgr, bbox=False, roi=False):
+        """Copy an image to a shared memory buffer and queue it for inference.
+
+        Args:
+            img_bgr (np.array): Decoded BGR image
+            bbox (bool): Return bbox coordinates instead of lines points
+            roi (bool): Restrict the segmentation to the region containing vegetation
+
+        Returns:
+            Future: Resolves to the predicted label, the list of bbox or lines and the region stats
+        """
+        shm = shared_memory.SharedMemory(create=True, size=img_bgr.nbytes)
+        shared_img = np.ndarray(img_bgr.shape, dtype=img_bgr.dtype, buffer=shm.buf)
+        shared_img[:] = img_bgr
+        del shared_img
+
+        task_id = next(self._task_ids)
+        future = Future()
+        deadline = time.monotonic() + self.timeout
+        with self._tasks_lock:
+            self._tasks[task_id] = {
+                "future": future,
+                "shm": shm,
+                "pid": None,
+                "deadline": deadline,
+            }
+        try:
+            self._task_queue.put_nowait((task_id, shm.name, img_bgr.shape, img_bgr.dtype.str, bbox, roi, deadline))
+        except queue.Full:
+            self._release(task_id)
+            raise InferenceQueueFull(f"Inference queue is full ({self.queue_depth} images waiting)")
+        return future
+
+    def process(self, img_bgr, bbox=False, roi=False):
+        """Submit an image and wait for its result.
+
+        The monitor owns the deadline, so this waits one monitor interval longer and only raises
+        InferenceTimeout itself if the monitor has not failed the task yet.
+
+        Args:
+            img_bgr (np.array): Decoded BGR image
+            bbox (bool): Return bbox coordinates instead of lines points
+            roi (bool): Restrict the segmentation to the region containing vegetation
+
+        Returns:
+            tuple(pred_label, list, dict): The predicted label, the list of bbox or lines and the region stats
+        """
+        future = self.submit(img_bgr, bbox, roi)
+        try:
+            return future.result(timeout=self.timeout + self.monitor_interval)
+        except TimeoutError:
+            raise InferenceTimeout(f"Image was not processed within {self.timeout}s")
+
+    def close(self, timeout=5):
+        """Stop the inference processes and release the pending shared memory buffers.
+
+        Args:
+            timeout (float): Seconds to wait for each process before terminating it
+        """
+        self._closing.set()
+        for _ in self._processes:
+            try:
+                self._task_queue.put(None, timeout=timeout)
+            except queue.Full:
+                break
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout)
+        self._result_queue.put(None)
+        self._dispatcher.join(timeout)
+        self._monitor.join(timeout)
+
+        with self._tasks_lock:
+            pending = list(self._tasks)
+        for task_id in pending:
+            future = self._release(task_id)
+            if future is not None:
+                future.cancel()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_inference_pool(cfg):
+    """
+    Returns the inference pool of the current process, starting it on the first call. The gunicorn
+    post_worker_init hook calls it when each worker starts, so requests only start the pool as a fallback.
+
+    Args:
+        cfg (Settings): Application settings
+
+    Returns:
+        The InferencePool of the current process, or None if the pool is disabled
+    """
+    global _pool, _pool_pid
+
+    if cfg.inference_workers <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = InferencePool(
+                cfg.model,
+                cfg.inference_workers,
+                cfg.inference_queue_depth,
+                cfg.opencv_threads,
+                cfg.inference_timeout,
+            )
+            _pool_pid = os.getpid()
+            atexit.register(_pool.close)
+    return _pool
@@ -13,37 +13,33 @@ class PlantSegmentation:
         logger (logging.Logger): Logger object.
         cfg (dict): A dictionary config.
         classifier (Classifier): Image type classifier model.
+        inference_pool (InferencePool): Pool of inference processes, or None to run in the calling thread.
     """
 
-    def __init__(self, cfg, model):
+    def __init__(self, cfg, model, inference_pool=None):
         """
         Args:
-            logger (logging.Logger): Logger object.
             cfg (dict): A dictionary config.
-            classifier (Classifier): Image type classifier model.
+            model (dict): Image type classifier model.
+            inference_pool (InferencePool): Pool of inference processes, or None to run in the calling thread.
         """
         self.logger = logging.getLogger(__name__)
         self.cfg = cfg
         self.classifier = Classifier(model)
         self.segmentation = Segmentation()
+        self.inference_pool = inference_pool
 
-    def main_routine(self, input):
-        """Main routine for plant segmentation.
+    def process_image(self, img_bgr, bbox=False, roi=False):
+        """Classify and segment a decoded image.
 
         Args:
-            input (dict): A dictionary with input data
+            img_bgr (np.array): Decoded BGR image
+            bbox (bool): Return bbox coordinates instead of lines points
+            roi (bool): Restrict the segmentation to the region containing vegetation
 
         Returns:
-            tuple(pred_label, list): The predicted label and the list of bbox or lines
+            tuple(pred_label, list, dict): The predicted label, the list of bbox or lines and the region stats
         """
-
-        if not input:
-            self.logger.info("Input is empty")
-            return None
-
-        nparr = np.fromstring(b64decode(input["base64"]), np.uint8)
-        img_bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
         img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
 
         mean_color = np.mean(img_rgb, axis=(0, 1))
@@ -52,10 +48,36 @@ class PlantSegmentation:
         features = mean_color
         pred_label = str(self.classifier.predict(list(features)))
 
-        output_list = self.segmentation.apply_segment(img_bgr, pred_label, bbox=input["bbox"])
+        output_list, stats = self.segmentation.apply_segment(img_bgr, pred_label, bbox=bbox, roi=roi)
 
         # img_bgr_copy = img_bgr.copy()
         # for out in output_list:
         #     cv2.line(img_bgr_copy, out[0], out[1], (0, 0, 255), 1)
         # cv2.imwrite("output.jpg", img_bgr_copy)
-        return pred_label, output_list
+        return pred_label, output_list, stats
+
+    def main_routine(self, input):
+        """Main routine for plant segmentation.
+
+        Args:
+            input (dict): A dictionary with input data
+
+        Returns:
+            tuple(pred_label, list, dict): The predicted label, the list of bbox or lines and the region stats
+        """
+
+        if not input:
+            self.logger.info("Input is empty")
+            return None
+
+        nparr = np.fromstring(b64decode(input["base64"]), np.uint8)
+        img_bgr = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+        bbox, roi = input["bbox"], input.get("roi", False)
+        if self.inference_pool is not None:
+            pred_label, output_list, stats = self.inference_pool.process(img_bgr, bbox, roi)
+        else:
+            pred_label, output_list, stats = self.process_image(img_bgr, bbox, roi)
+
+        self.logger.info(f"Skipped {stats['skipped_ratio']:.2%} of the image area")
+        return pred_label, output_list, stats
@@ -5,11 +5,13 @@ from pydantic import BaseModel
 class SegmentPayload(BaseModel):
     base64: str
     bbox: bool = False
+    roi: bool = False
 
 
 class ModelResponse(BaseModel):
     pred_label: str
     data: Optional[list] = None
+    stats: Optional[dict] = None
 
 
 class ErrorDescription(BaseModel):
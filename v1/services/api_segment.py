@@ -6,6 +6,12 @@ from flask_restful import Resource
 from pydantic.error_wrappers import ValidationError
 
 from settings import Settings
+from v1.routines.inference_pool import (
+    InferenceQueueFull,
+    InferenceTimeout,
+    InferenceWorkerError,
+    get_inference_pool,
+)
 from v1.routines.plant_segmentation import PlantSegmentation
 from v1.schemas.payloads import (
     SegmentPayload,
@@ -24,34 +30,45 @@ class ApiSegment(Resource):
     def get(self):
         return {"success": "ok"}, 200
 
+    def _error_response(self, e, code, headers=None):
+        error_description = ErrorDescription(
+            raised=type(e).__name__,
+            raisedOn="ApiSegment",
+            message=str(e),
+            code=str(code),
+        )
+        response = Response(
+            message="failed",
+            data=None,
+            error=error_description,
+            version=self.cfg.version,
+        )
+        return response.dict(), code, headers or {}
+
     def post(self):
         json_data = request.get_json(force=True)
 
         self.logger.info(f"Processing started at {str(datetime.now())}")
         try:
             SegmentPayload.parse_obj(json_data)
-            pred_label, data = self.plant_segmentation.main_routine(json_data)
+            self.plant_segmentation.inference_pool = get_inference_pool(self.cfg)
+            pred_label, data, stats = self.plant_segmentation.main_routine(json_data)
+
+        except (InferenceQueueFull, InferenceWorkerError) as e:
+            return self._error_response(e, 503, {"Retry-After": "1"})
+
+        except InferenceTimeout as e:
+            return self._error_response(e, 504)
 
         except (ValidationError, Exception) as e:
-            error_description = ErrorDescription(
-                raised=type(e).__name__,
-                raisedOn="ApiSegment",
-                message=str(e),
-                code="400",
-            )
-            response = Response(
-                message="failed",
-                data=None,
-                error=error_description,
-                version=self.cfg.version,
-            )
-            return response.dict(), 400
+            return self._error_response(e, 400)
 
         response = Response(
             message="success",
             data=ModelResponse(
                 pred_label=str(pred_label),
                 data=data,
+                stats=stats,
             ),
             error=None,
             version=self.cfg.version,